@@ -1,10 +1,4 @@
-from passlib.context import CryptContext
+# Reexporta el servicio único de hashing (utils/hashing.py)
+from coworking_reservations.utils.hashing import password_hasher, verify_password, get_password_hash
 
-# Configuración de hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+pwd_context = password_hasher.context
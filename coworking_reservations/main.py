@@ -2,8 +2,9 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from coworking_reservations.routers import auth, users, rooms, reservations
+from coworking_reservations.routers import auth, users, rooms, reservations, admin
 from coworking_reservations.services.database import init_default_admin
+from coworking_reservations.services.profiling import ProfilingMiddleware
 
 
 # Configuración del lifespan para inicialización
@@ -34,12 +35,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling bajo demanda (no hace nada mientras no haya una sesión activa)
+app.add_middleware(ProfilingMiddleware)
+
 
 # Importacion de routers
 app.include_router(auth.router, prefix="/auth", tags=["Autenticación"])
 app.include_router(users.router, prefix="/users", tags=["Usuarios"])
 app.include_router(rooms.router, prefix="/rooms", tags=["Salas"])
 app.include_router(reservations.router, prefix="/reservations", tags=["Reservas"])
+app.include_router(admin.router, prefix="/admin", tags=["Administración"])
 
 
 
@@ -0,0 +1,54 @@
+# routers/admin.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from coworking_reservations.services.profiling import profiler
+from coworking_reservations.utils.security import get_current_admin_user
+
+router = APIRouter()
+
+# start/stop son síncronos: FastAPI los ejecuta en un hilo y no bloquean el event loop
+@router.post("/profiling/start")
+def start_profiling(
+    seconds: Optional[float] = Query(None, gt=0, le=600),
+    requests: Optional[int] = Query(None, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    memory: bool = False,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Iniciar profiling por N segundos o N peticiones (solo admin)"""
+    if seconds is None and requests is None:
+        raise HTTPException(status_code=400, detail="Either seconds or requests is required")
+    try:
+        profiler.start(seconds=seconds, requests=requests, interval=interval_ms / 1000, memory=memory)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.status()
+
+@router.post("/profiling/stop")
+def stop_profiling(current_user: dict = Depends(get_current_admin_user)):
+    """Detener el profiling activo (solo admin)"""
+    if profiler.stop() is None:
+        raise HTTPException(status_code=409, detail="No profiling session is running")
+    return profiler.status()
+
+@router.get("/profiling/status")
+async def get_profiling_status(current_user: dict = Depends(get_current_admin_user)):
+    """Estado del profiling (solo admin)"""
+    return profiler.status()
+
+@router.get("/profiling/report")
+async def get_profiling_report(current_user: dict = Depends(get_current_admin_user)):
+    """Reporte completo de la última sesión: pilas folded, memoria y peticiones (solo admin)"""
+    report = profiler.report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profiling report available")
+    return report
+
+@router.get("/profiling/flamegraph", response_class=PlainTextResponse)
+async def get_profiling_flamegraph(current_user: dict = Depends(get_current_admin_user)):
+    """Pilas en formato folded para flamegraph.pl o speedscope (solo admin)"""
+    report = profiler.report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profiling report available")
+    return report["folded"]
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException, status, FastAPI, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status, FastAPI, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from coworking_reservations.models.user import UserCreate, UserResponse, Token
-from coworking_reservations.utils.security import (authenticate_user, create_access_token, get_password_hash)
+from coworking_reservations.utils.security import (authenticate_user, create_access_token, get_password_hash,
+                                                   needs_password_rehash, rehash_password, schedule_rehash)
 from coworking_reservations.services.database import database
 
 
@@ -25,14 +26,23 @@ async def register_user(user: UserCreate):
     return new_user
 
 @router.post("/login", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login_for_access_token(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    form_data: OAuth2PasswordRequestForm = Depends()
+):
+    client = request.client.host if request.client else ""
+    user = authenticate_user(form_data.username, form_data.password, client)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Si cambió el costo de hashing, regenerar el hash después de responder
+    if needs_password_rehash(user["contraseña_hash"]) and schedule_rehash(user["id"]):
+        background_tasks.add_task(rehash_password, user["id"], form_data.password, user["contraseña_hash"])
+
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
         data={"sub": user["email"]}, expires_delta=access_token_expires
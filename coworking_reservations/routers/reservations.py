@@ -1,10 +1,12 @@
 # routers/reservations.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List
 from coworking_reservations.models.reservation import ReservationCreate, ReservationResponse
-from coworking_reservations.utils.security import get_current_active_user
+from coworking_reservations.utils.security import get_current_active_user, get_current_admin_user
 from coworking_reservations.services.database import database
 from coworking_reservations.services.validation import validate_reservation
+from coworking_reservations.services.bulk import BULK_FORMATS, MEDIA_TYPES, export_rows
 from datetime import date
 
 router = APIRouter()
@@ -43,17 +45,16 @@ async def get_reservations_by_room(room_id: int, current_user: dict = Depends(ge
 @router.get("/date/{reservation_date}", response_model=List[ReservationResponse])
 async def get_reservations_by_date(reservation_date: date, current_user: dict = Depends(get_current_active_user)):
     """Obtener reservas por fecha"""
-    # Convertir date a string para comparar con la base de datos
-    date_str = reservation_date.isoformat()
-    all_reservations = database.get_all("reservations")
-    
-    # Filtrar reservas por fecha
-    reservations_on_date = [
-        reservation for reservation in all_reservations 
-        if reservation.get("fecha") == date_str
-    ]
-    
-    return reservations_on_date
+    return database.get_all_by_field("reservations", "fecha", reservation_date)
+
+@router.get("/export")
+async def export_reservations(
+    format: str = Query("jsonl", pattern=BULK_FORMATS),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Exportar reservas en JSONL o CSV (solo admin)"""
+    rows = export_rows(database.query("reservations"), format, list(ReservationResponse.model_fields))
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format])
 
 @router.delete("/{reservation_id}")
 async def cancel_reservation(reservation_id: int, current_user: dict = Depends(get_current_active_user)):
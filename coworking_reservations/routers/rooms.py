@@ -1,11 +1,13 @@
 
 # routers/rooms.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List
 from coworking_reservations.models.room import RoomResponse, RoomWithResources
 from coworking_reservations.services.database import database
 from coworking_reservations.models.room import RoomCreate
 from coworking_reservations.utils.security import get_current_admin_user
+from coworking_reservations.services.bulk import BULK_FORMATS, MEDIA_TYPES, export_rows, import_rows
 
 router = APIRouter()
 
@@ -19,6 +21,34 @@ async def create_room(room: RoomCreate, current_user: dict = Depends(get_current
     room_data = room.dict()
     return database.create("rooms", room_data)
 
+async def _prepare_rooms(batch, errors):
+    # Descartar salas de sedes inexistentes
+    rooms = []
+    for line_number, room in batch:
+        if not database.get_by_id("sedes", room.sede_id):
+            errors.append({"line": line_number, "detail": "Sede not found"})
+            continue
+        rooms.append(room.dict())
+    return rooms
+
+@router.post("/import")
+async def import_rooms(
+    request: Request,
+    format: str = Query("jsonl", pattern=BULK_FORMATS),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Importar salas desde JSONL o CSV en streaming (solo admin)"""
+    return await import_rows(request, format, "rooms", RoomCreate, _prepare_rooms)
+
+@router.get("/export")
+async def export_rooms(
+    format: str = Query("jsonl", pattern=BULK_FORMATS),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Exportar salas en JSONL o CSV (solo admin)"""
+    rows = export_rows(database.query("rooms"), format, list(RoomResponse.model_fields))
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format])
+
 @router.put("/{room_id}", response_model=RoomResponse)
 async def update_room(room_id: int, room: RoomCreate, current_user: dict = Depends(get_current_admin_user)):
     """Actualizar sala (solo admin)"""
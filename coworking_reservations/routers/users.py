@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, FastAPI, HTTPException
-from coworking_reservations.models.user import UserResponse
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from coworking_reservations.models.user import UserCreate, UserResponse
 from coworking_reservations.utils.security import get_current_active_user, get_current_admin_user
 from coworking_reservations.services.database import database
+from coworking_reservations.services.bulk import BULK_FORMATS, MEDIA_TYPES, export_rows, hash_passwords, import_rows
 from typing import List
 
 router = APIRouter()
@@ -16,6 +18,45 @@ async def get_all_users(current_user: dict = Depends(get_current_admin_user)):
     """Obtener todos los usuarios (solo admin)"""
     return database.get_all("users")
 
+async def _prepare_users(batch, errors):
+    # Descartar emails ya registrados (índice de email) o repetidos dentro del lote;
+    # los lotes anteriores ya están guardados cuando llega el siguiente
+    seen = set()
+    users = []
+    for line_number, user in batch:
+        if user.email in seen or database.get_by_field("users", "email", user.email):
+            errors.append({"line": line_number, "detail": "Email already registered"})
+            continue
+        seen.add(user.email)
+        users.append(user)
+
+    hashed_passwords = await hash_passwords([user.contraseña for user in users])
+    user_dicts = []
+    for user, hashed_password in zip(users, hashed_passwords):
+        user_dict = user.dict()
+        user_dict["contraseña_hash"] = hashed_password
+        del user_dict["contraseña"]
+        user_dicts.append(user_dict)
+    return user_dicts
+
+@router.post("/import")
+async def import_users(
+    request: Request,
+    format: str = Query("jsonl", pattern=BULK_FORMATS),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Importar usuarios desde JSONL o CSV en streaming (solo admin)"""
+    return await import_rows(request, format, "users", UserCreate, _prepare_users)
+
+@router.get("/export")
+async def export_users(
+    format: str = Query("jsonl", pattern=BULK_FORMATS),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """Exportar usuarios en JSONL o CSV (solo admin)"""
+    rows = export_rows(database.query("users"), format, list(UserResponse.model_fields))
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format])
+
 @router.delete("/{user_id}")
 async def delete_user(user_id: int, current_user: dict = Depends(get_current_admin_user)):
     """Eliminar usuario (solo admin)"""
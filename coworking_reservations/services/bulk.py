@@ -0,0 +1,172 @@
+# services/bulk.py
+import asyncio
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable, Iterator, AsyncIterator, Callable, Awaitable, Tuple
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from coworking_reservations.services.database import database
+from coworking_reservations.utils.security import get_password_hash
+
+BULK_FORMATS = "^(jsonl|csv)$"
+MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+# Filas validadas por escritura del archivo
+BATCH_SIZE = 500
+# Tamaño aproximado de cada fragmento de la exportación
+EXPORT_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+# bcrypt libera el GIL, así que un pool de hilos basta para hashear en paralelo
+_hash_pool = ThreadPoolExecutor(thread_name_prefix="bulk-hash")
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def _iter_csv_rows(lines: AsyncIterator[str]):
+    header = None
+    line_number = 0
+    record: List[str] = []
+    record_start = 0
+    quotes = 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            if not line.strip():
+                continue
+            record_start = line_number
+        record.append(line + "\n")
+        # Un campo entre comillas puede contener saltos de línea: la fila
+        # termina cuando las comillas quedan balanceadas
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        values = next(csv.reader(record))
+        record = []
+        quotes = 0
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield record_start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Las celdas vacías se omiten para que apliquen los valores por defecto
+        yield record_start, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if record:
+        yield record_start, None, "Unterminated quoted field"
+
+
+async def _iter_jsonl_rows(lines: AsyncIterator[str]):
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def iter_rows(request: Request, fmt: str) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Recorre el cuerpo de la petición fila a fila: (línea, fila, error)."""
+    lines = _iter_lines(request)
+    return _iter_csv_rows(lines) if fmt == "csv" else _iter_jsonl_rows(lines)
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_hash_pool, get_password_hash, p) for p in passwords))
+
+
+async def import_rows(
+    request: Request,
+    fmt: str,
+    collection: str,
+    model: type,
+    prepare_batch: Callable[[List[Tuple[int, BaseModel]], List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+) -> Dict[str, Any]:
+    """Valida las filas a medida que llegan y las guarda en lotes de BATCH_SIZE.
+
+    ``prepare_batch`` convierte un lote de modelos validados en los dicts a
+    insertar y puede descartar filas agregando su error a la lista recibida.
+    """
+    created = 0
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    batch: List[Tuple[int, BaseModel]] = []
+
+    def report(line_number: int, detail: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "detail": detail})
+
+    async def commit():
+        nonlocal created
+        batch_errors: List[Dict[str, Any]] = []
+        items = await prepare_batch(batch, batch_errors)
+        for error in batch_errors:
+            report(error["line"], error["detail"])
+        if items:
+            # Reescribe el JSON y el snapshot: fuera del event loop para no frenar otras peticiones
+            await run_in_threadpool(database.create_many, collection, items)
+            created += len(items)
+        batch.clear()
+
+    async for line_number, row, error in iter_rows(request, fmt):
+        if error is not None:
+            report(line_number, error)
+            continue
+        try:
+            batch.append((line_number, model(**row)))
+        except ValidationError as e:
+            report(line_number, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        if len(batch) >= BATCH_SIZE:
+            await commit()
+
+    if batch:
+        await commit()
+
+    return {"created": created, "failed": failed, "errors": errors}
+
+
+def export_rows(items: Iterable[Dict[str, Any]], fmt: str, fields: List[str]) -> Iterator[str]:
+    """Genera la exportación en fragmentos sin armar el contenido completo en memoria."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+
+    for item in items:
+        if writer is not None:
+            writer.writerow(item)
+        else:
+            buffer.write(json.dumps({field: item.get(field) for field in fields}, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
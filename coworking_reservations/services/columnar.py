@@ -0,0 +1,185 @@
+# services/columnar.py
+from array import array
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Any, List, Iterable, Optional
+from coworking_reservations.services.query import Table, HashIndex, SortedIndex
+
+# Estados conocidos de una reserva; cada uno se guarda como un código pequeño
+ESTADOS = ["pendiente", "confirmada", "cancelada"]
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_MISSING = -(2 ** 63)
+# Errores de una reserva que no se puede codificar en columnas (campo faltante,
+# fecha nula, fecha con zona horaria, id fuera de rango...)
+ENCODE_ERRORS = (KeyError, ValueError, TypeError, OverflowError)
+# Columnas enteras que nunca quedan vacías: sus índices son SortedIndex sobre el valor codificado
+_SORTED_INDEX_FIELDS = {"id", "room_id", "usuario_id", "fecha", "hora_inicio", "hora_fin"}
+
+
+def _time_to_micros(value: time) -> int:
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1_000_000 + value.microsecond
+
+
+def _micros_to_time(value: int) -> time:
+    seconds, micros = divmod(value, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, micros)
+
+
+def _datetime_to_micros(value: Optional[str]) -> int:
+    if value is None:
+        return _MISSING
+    return (datetime.fromisoformat(value) - _EPOCH) // _MICROSECOND
+
+
+def _micros_to_datetime(value: int) -> Optional[str]:
+    if value == _MISSING:
+        return None
+    return (_EPOCH + value * _MICROSECOND).isoformat()
+
+
+class ReservationColumns(Table):
+    """Representación columnar de la colección de reservas.
+
+    Cada campo vive en un ``array`` tipado: fechas como ordinales, horas como
+    microsegundos desde medianoche y el estado como código entero. Las
+    consultas comparan valores codificados y los dicts solo se materializan
+    al devolverlos. Los índices de columnas enteras son arrays ordenados
+    (SortedIndex) en vez de dicts. Las reservas eliminadas quedan marcadas en
+    ``alive`` para que las referencias de los índices no cambien.
+    """
+
+    def __init__(self, indexed_fields: List[str]):
+        super().__init__(indexed_fields)
+        self.ids = array("q")
+        self.room_ids = array("q")
+        self.usuario_ids = array("q")
+        self.fechas = array("l")
+        self.horas_inicio = array("q")
+        self.horas_fin = array("q")
+        self.estados = array("b")
+        self.created_at = array("q")
+        self.updated_at = array("q")
+        self.alive = bytearray()
+        self._estado_names: List[str] = list(ESTADOS)
+        self._estado_codes: Dict[str, int] = {name: i for i, name in enumerate(ESTADOS)}
+        self._columns = {
+            "id": self.ids,
+            "room_id": self.room_ids,
+            "usuario_id": self.usuario_ids,
+            "fecha": self.fechas,
+            "hora_inicio": self.horas_inicio,
+            "hora_fin": self.horas_fin,
+            "estado": self.estados,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], indexed_fields: List[str]) -> "ReservationColumns":
+        """Carga las reservas en columnas; ValueError si alguna no se puede codificar."""
+        columns = cls(indexed_fields)
+        for record in records:
+            try:
+                columns.insert(record)
+            except ENCODE_ERRORS as e:
+                raise ValueError(f"reservation {record.get('id')!r}: {e!r}") from e
+        return columns
+
+    def __len__(self) -> int:
+        return self.alive.count(1)
+
+    def estado_code(self, estado: str) -> int:
+        code = self._estado_codes.get(estado)
+        if code is None:
+            code = len(self._estado_names)
+            self._estado_names.append(estado)
+            self._estado_codes[estado] = code
+        return code
+
+    def _encode_record(self, record: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "id": int(record["id"]),
+            "room_id": int(record["room_id"]),
+            "usuario_id": int(record["usuario_id"]),
+            "fecha": date.fromisoformat(record["fecha"]).toordinal(),
+            "hora_inicio": _time_to_micros(time.fromisoformat(record["hora_inicio"])),
+            "hora_fin": _time_to_micros(time.fromisoformat(record["hora_fin"])),
+            "estado": self.estado_code(record.get("estado", "pendiente")),
+            "created_at": _datetime_to_micros(record.get("created_at")),
+            "updated_at": _datetime_to_micros(record.get("updated_at")),
+        }
+
+    def refs(self) -> List[int]:
+        alive = self.alive
+        return [ref for ref in range(len(alive)) if alive[ref]]
+
+    def value(self, ref: int, field: str) -> Any:
+        column = self._columns.get(field)
+        if column is None:
+            return None
+        value = column[ref]
+        if column is self.estados:
+            # El código no conserva el orden alfabético: se compara por nombre
+            return self._estado_names[value]
+        return None if value == _MISSING else value
+
+    def _new_index(self, field: str):
+        return SortedIndex() if field in _SORTED_INDEX_FIELDS else HashIndex()
+
+    def _index_key(self, ref: int, field: str) -> Any:
+        if field in _SORTED_INDEX_FIELDS:
+            return self._columns[field][ref]
+        return self.value(ref, field)
+
+    def encode(self, field: str, value: Any) -> Any:
+        """Convierte el valor de una consulta (formato ISO) al formato de la columna."""
+        if value is None or field not in self._columns or field == "estado":
+            return value
+        if field == "fecha":
+            return (date.fromisoformat(value) if isinstance(value, str) else value).toordinal()
+        if field in ("hora_inicio", "hora_fin"):
+            return _time_to_micros(time.fromisoformat(value) if isinstance(value, str) else value)
+        if field in ("created_at", "updated_at"):
+            return _datetime_to_micros(value if isinstance(value, str) else value.isoformat())
+        return value
+
+    def insert(self, record: Dict[str, Any]) -> int:
+        encoded = self._encode_record(record)
+        for field, column in self._columns.items():
+            column.append(encoded[field])
+        self.alive.append(1)
+        ref = len(self.alive) - 1
+        self._add_to_indexes(ref)
+        return ref
+
+    def replace(self, ref: int, record: Dict[str, Any]):
+        old_values = self._indexed_values(ref)
+        encoded = self._encode_record(record)
+        for field, column in self._columns.items():
+            column[ref] = encoded[field]
+        self._reindex(ref, old_values)
+
+    def remove(self, ref: int):
+        self._remove_from_indexes(ref)
+        self.alive[ref] = 0
+
+    def materialize(self, ref: int) -> Optional[Dict[str, Any]]:
+        if not self.alive[ref]:
+            return None
+        record = {
+            "room_id": self.room_ids[ref],
+            "fecha": date.fromordinal(self.fechas[ref]).isoformat(),
+            "hora_inicio": _micros_to_time(self.horas_inicio[ref]).isoformat(),
+            "hora_fin": _micros_to_time(self.horas_fin[ref]).isoformat(),
+            "usuario_id": self.usuario_ids[ref],
+            "estado": self._estado_names[self.estados[ref]],
+            "id": self.ids[ref],
+            "created_at": _micros_to_datetime(self.created_at[ref]),
+        }
+        updated_at = _micros_to_datetime(self.updated_at[ref])
+        if updated_at is not None:
+            record["updated_at"] = updated_at
+        return record
@@ -1,14 +1,56 @@
 # services/database.py
 import json
 import os
-from typing import Dict, List, Any, Optional
+import threading
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from fastapi import HTTPException
 from datetime import datetime, date, time
+from coworking_reservations.services.columnar import ENCODE_ERRORS, ReservationColumns
+from coworking_reservations.services.snapshot import Snapshot, write_snapshot
+from coworking_reservations.services.query import Table, DictTable
+
+# Llaves foráneas por colección: (campo, colección referenciada, regla ON DELETE)
+FOREIGN_KEYS = {
+    "rooms": [("sede_id", "sedes", "CASCADE")],
+    "room_recursos": [("room_id", "rooms", "CASCADE"), ("recurso_id", "recursos", "CASCADE")],
+    "reservations": [("usuario_id", "users", "CASCADE"), ("room_id", "rooms", "CASCADE")],
+    "penalizaciones": [("usuario_id", "users", "CASCADE")],
+}
+
+# Relaciones inversas: colección referenciada -> [(colección hija, campo, regla)]
+REFERENCED_BY: Dict[str, List[tuple]] = {}
+for _child, _keys in FOREIGN_KEYS.items():
+    for _field, _parent, _rule in _keys:
+        REFERENCED_BY.setdefault(_parent, []).append((_child, _field, _rule))
+
+# Reservas en columnas tipadas (services/columnar.py); COLUMNAR_RESERVATIONS=0 las
+# guarda como dicts igual que el resto de colecciones
+COLUMNAR_RESERVATIONS = os.getenv("COLUMNAR_RESERVATIONS", "1") != "0"
+
+# Campos indexados por colección (índices del esquema más llaves primarias y
+# foráneas), en orden de preferencia para el planificador de query()
+INDEXED_FIELDS = {
+    "users": ["id", "email", "rol"],
+    "sedes": ["id", "ciudad"],
+    "recursos": ["id"],
+    "rooms": ["id", "nombre", "sede_id"],
+    "room_recursos": ["id", "room_id", "recurso_id"],
+    "reservations": ["id", "room_id", "usuario_id", "fecha", "estado"],
+    "penalizaciones": ["id", "usuario_id"],
+}
 
 
 class JSONDatabase:
-    def __init__(self, file_path: str = "data/database.json"):
+    def __init__(self, file_path: str = "data/database.json", columnar_reservations: bool = COLUMNAR_RESERVATIONS):
         self.file_path = os.path.abspath(file_path)
+        self.columnar_reservations = columnar_reservations
+        # Snapshot binario junto al JSON para arrancar sin parsear todo el archivo
+        self.snapshot_path = os.path.splitext(self.file_path)[0] + ".snap"
+        self._snapshot: Optional[Snapshot] = None
+        # Tablas en memoria por colección, válidas mientras el archivo tenga este stamp
+        self._tables: Dict[str, Table] = {}
+        self._collections_stamp = None
+        self._lock = threading.RLock()
         self._ensure_file_exists()
         
     def _ensure_file_exists(self):
@@ -270,9 +312,138 @@ class JSONDatabase:
             }
             self._write_data(initial_data)
     
-    def _read_data(self) -> Dict[str, List[Any]]:
+    def _file_stamp(self):
+        # Identifica la versión actual del archivo (también si otro worker lo reescribe).
+        # Cada escritura crea un archivo nuevo, así que el inodo cambia aunque el
+        # tamaño y el mtime (de resolución gruesa en algunos sistemas) coincidan
+        stat = os.stat(self.file_path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _open_snapshot(self, stamp):
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = Snapshot.open(self.snapshot_path, stamp)
+
+    def _sync(self):
+        """Descarta las tablas en memoria si el JSON cambió desde la última lectura."""
+        stamp = self._file_stamp()
+        if stamp != self._collections_stamp:
+            self._open_snapshot(stamp)
+            self._tables = {}
+            self._collections_stamp = stamp
+        return stamp
+
+    def _save_snapshot(self, data: Dict[str, List[Any]], stamp):
+        # El snapshot es solo una caché: si no se puede escribir se sigue usando el JSON
+        try:
+            write_snapshot(self.snapshot_path, data, stamp)
+        except OSError:
+            pass
+
+    def _load_data(self):
+        """Lee todas las colecciones; devuelve también el stamp si coinciden con las tablas."""
+        stamp = self._sync()
+        if self._snapshot is not None:
+            try:
+                return {name: self._snapshot.load(name) for name in self._snapshot.collections()}, stamp
+            except (ValueError, EOFError, TypeError):
+                pass
+
         with open(self.file_path, 'r') as f:
-            return json.load(f)
+            data = json.load(f)
+        self._save_snapshot(data, stamp)
+        self._open_snapshot(stamp)
+        # El JSON pudo cambiar después del stat: no se asume que coincida con las tablas
+        return data, None
+
+    def _read_data(self) -> Dict[str, List[Any]]:
+        return self._load_data()[0]
+
+    def _load_items(self, collection: str) -> List[Any]:
+        if self._snapshot is not None:
+            try:
+                return self._snapshot.load(collection) if collection in self._snapshot else []
+            except (ValueError, EOFError, TypeError):
+                pass
+        return self._read_data().get(collection, [])
+
+    def _table(self, collection: str) -> Table:
+        """Tabla en memoria de la colección, decodificada del snapshot la primera vez que se usa.
+
+        Con ``columnar_reservations`` las reservas se cargan directamente en
+        columnas: los dicts decodificados del bloque del snapshot se descartan
+        apenas se codifican.
+        """
+        with self._lock:
+            self._sync()
+            table = self._tables.get(collection)
+            if table is None:
+                items = self._load_items(collection)
+                if not isinstance(items, list):
+                    items = []
+                indexed_fields = INDEXED_FIELDS.get(collection, ["id"])
+                if collection == "reservations" and self.columnar_reservations:
+                    try:
+                        table = ReservationColumns.from_records(items, indexed_fields)
+                    except ValueError as e:
+                        # Una fila que no cabe en las columnas no debe tumbar la
+                        # colección: se sirve como dicts, igual que sin columnas
+                        print(f"⚠️ Reservas cargadas como dicts, fila no válida para columnas: {e}")
+                        table = DictTable(items, indexed_fields)
+                else:
+                    table = DictTable(items, indexed_fields)
+                self._tables[collection] = table
+            return table
+
+    def _commit(self, data: Dict[str, List[Any]], base_stamp, changes: Dict[str, Dict[str, Any]]):
+        """Escribe el archivo y aplica los cambios a las tablas cargadas en lugar de descartarlas.
+
+        ``changes`` es colección -> {"inserted": [...], "updated": [...], "deleted": {ids}}.
+        Si las tablas no corresponden a los datos leídos se descartan.
+        """
+        new_stamp = self._write_data(data)
+        if base_stamp is None or base_stamp != self._collections_stamp:
+            self._collections_stamp = None
+            return
+        try:
+            for collection, change in changes.items():
+                table = self._tables.get(collection)
+                if table is None:
+                    continue
+                for item in change.get("inserted", []):
+                    table.insert(item)
+                for item in change.get("updated", []):
+                    for ref in list(table.lookup("id", item["id"])):
+                        table.replace(ref, item)
+                for item_id in change.get("deleted", ()):
+                    for ref in list(table.lookup("id", item_id)):
+                        table.remove(ref)
+        except ENCODE_ERRORS:
+            # El registro no cabe en la tabla en memoria (p. ej. en columnas):
+            # se reconstruye desde el archivo al próximo uso
+            self._collections_stamp = None
+            return
+        self._collections_stamp = new_stamp
+        self._open_snapshot(new_stamp)
+
+    def query(
+        self,
+        collection: str,
+        where: Optional[List[Tuple[str, str, Any]]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Consulta con predicados (campo, operador, valor) combinados con AND.
+
+        Operadores: ==, !=, <, <=, >, >=. Las fechas se comparan en formato ISO,
+        igual que como se guardan. Ver Table.query en services/query.py.
+        """
+        where = [(field, op, self._convert_dates(value)) for field, op, value in (where or [])]
+        # El plan (y los índices que construya) se resuelve bajo el lock; el
+        # resultado se recorre después sin bloquear las escrituras
+        with self._lock:
+            return self._table(collection).query(where, order_by, descending, limit)
 
     def _convert_dates(self, obj):
         if isinstance(obj, (datetime, date, time)):
@@ -285,102 +456,161 @@ class JSONDatabase:
 
     def _write_data(self, data: Dict[str, List[Any]]):
         data = self._convert_dates(data)
-        with open(self.file_path, 'w') as f:
+        # Archivo temporal + replace: nadie lee un JSON a medio escribir
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._save_snapshot(data, stamp)
+        return stamp
     
     def get_all(self, collection: str) -> List[Any]:
-        data = self._read_data()
-        return data.get(collection, [])
+        return list(self.query(collection))
     
-    def get_by_id(self, collection: str, item_id: int) -> Optional[Any]:
-        data = self._read_data()
-        items = data.get(collection, [])
-        for item in items:
-            # Convertir item["id"] a int para comparación segura
+    def _id_refs(self, table: Table, item_id: Any) -> List[int]:
+        """Refs del registro con ese id, buscados siempre por el índice de ``id``.
+
+        Los datos antiguos pueden guardar el id como texto: si no hay
+        coincidencia se repite la búsqueda con la llave normalizada.
+        """
+        refs = table.lookup("id", item_id)
+        if refs:
+            return refs
+        if isinstance(item_id, int):
+            alternative = str(item_id)
+        else:
             try:
-                item_id_value = int(item.get("id"))
+                alternative = int(item_id)
             except (ValueError, TypeError):
-                continue
-            if item_id_value == item_id:
-                return item
-        return None
+                return []
+        return table.lookup("id", alternative)
+
+    def get_by_id(self, collection: str, item_id: int) -> Optional[Any]:
+        with self._lock:
+            table = self._table(collection)
+            refs = self._id_refs(table, item_id)
+            return table.materialize(refs[0]) if refs else None
     
     def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Any]:
-        data = self._read_data()
-        items = data.get(collection, [])
-        for item in items:
-            if item.get(field) == value:
-                return item
-        return None
+        return next(self.query(collection, [(field, "==", value)], limit=1), None)
     
     def get_all_by_field(self, collection: str, field: str, value: Any) -> List[Any]:
-        data = self._read_data()
-        items = data.get(collection, [])
-        return [item for item in items if item.get(field) == value]
+        return list(self.query(collection, [(field, "==", value)]))
     
     def create(self, collection: str, item: Dict[str, Any]) -> Dict[str, Any]:
-        data = self._read_data()
-        items = data.get(collection, [])
+        return self.create_many(collection, [item])[0]
+    
+    def create_many(self, collection: str, new_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Inserta varios registros con una sola escritura del archivo."""
+        with self._lock:
+            data, base_stamp = self._load_data()
+            items = data.get(collection, [])
 
-        # Generar ID
-        new_id = max([item.get("id", 0) for item in items] or [0]) + 1
-        item["id"] = new_id
+            # Generar IDs consecutivos
+            next_id = max([item.get("id", 0) for item in items] or [0]) + 1
+            created = []
+            for item in new_items:
+                item["id"] = next_id
+                next_id += 1
 
-        # Agregar timestamps si no existen
-        if "created_at" not in item:
-            item["created_at"] = datetime.now().isoformat()
-        if "updated_at" not in item and any(key in item for key in ["updated_at", "update_at"]):
-            item["updated_at"] = datetime.now().isoformat()
+                # Agregar timestamps si no existen
+                if "created_at" not in item:
+                    item["created_at"] = datetime.now().isoformat()
+                if "updated_at" not in item and any(key in item for key in ["updated_at", "update_at"]):
+                    item["updated_at"] = datetime.now().isoformat()
 
-        # Convertir objetos de fecha a strings antes de guardar
-        item = self._convert_dates(item)
+                # Convertir objetos de fecha a strings antes de guardar
+                created.append(self._convert_dates(item))
 
-        items.append(item)
-        data[collection] = items
-        self._write_data(data)
+            items.extend(created)
+            data[collection] = items
+            self._commit(data, base_stamp, {collection: {"inserted": created}})
 
-        return item
+            return created
     
-    def update(self, collection: str, item_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
-        data = self._read_data()
-        items = data.get(collection, [])
+    def update(
+        self,
+        collection: str,
+        item_id: int,
+        updates: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Actualiza un registro; con ``expected`` solo lo hace si esos campos
+        conservan el valor indicado y devuelve None si alguno cambió."""
+        with self._lock:
+            data, base_stamp = self._load_data()
+            items = data.get(collection, [])
 
-        # Convertir objetos de fecha en updates a strings
-        updates = self._convert_dates(updates)
+            # Convertir objetos de fecha en updates a strings
+            updates = self._convert_dates(updates)
 
-        for i, item in enumerate(items):
-            if item.get("id") == item_id:
-                # Actualizar campos
-                items[i].update(updates)
-                # Actualizar timestamp de modificación
-                if "updated_at" in items[i] or any(key in items[i] for key in ["updated_at", "update_at"]):
-                    items[i]["updated_at"] = datetime.now().isoformat()
+            for i, item in enumerate(items):
+                if item.get("id") == item_id:
+                    if expected and any(item.get(field) != value for field, value in expected.items()):
+                        return None
+                    # Actualizar campos
+                    items[i].update(updates)
+                    # Actualizar timestamp de modificación
+                    if "updated_at" in items[i] or any(key in items[i] for key in ["updated_at", "update_at"]):
+                        items[i]["updated_at"] = datetime.now().isoformat()
 
-                data[collection] = items
-                self._write_data(data)
-                return items[i]
+                    data[collection] = items
+                    self._commit(data, base_stamp, {collection: {"updated": [items[i]]}})
+                    return items[i]
 
         raise HTTPException(status_code=404, detail=f"{collection[:-1]} not found")
     
-    def delete(self, collection: str, item_id: int) -> bool:
-        data = self._read_data()
-        items = data.get(collection, [])
-        
-        for i, item in enumerate(items):
-            if item.get("id") == item_id:
-                del items[i]
-                data[collection] = items
-                self._write_data(data)
-                return True
-        
-        return False
+    def delete(self, collection: str, item_id: int, on_delete: Optional[str] = None) -> bool:
+        """Elimina un registro aplicando las reglas de las llaves foráneas que lo referencian.
+
+        Los dependientes se encuentran con los índices de las llaves foráneas,
+        que se actualizan junto con la escritura en vez de reconstruirse. ``on_delete`` ("CASCADE" o "RESTRICT") reemplaza la
+        regla definida en FOREIGN_KEYS.
+        """
+        with self._lock:
+            table = self._table(collection)
+            refs = self._id_refs(table, item_id)
+            if not refs:
+                return False
+            # Se usa el id tal como está guardado (puede ser texto en datos antiguos)
+            item_id = table.value(refs[0], "id")
+            data, base_stamp = self._load_data()
+
+            to_delete: Dict[str, set] = {collection: {item_id}}
+            pending = [(collection, item_id)]
+            while pending:
+                parent, parent_id = pending.pop()
+                for child, field, rule in REFERENCED_BY.get(parent, []):
+                    table = self._table(child)
+                    children = table.lookup(field, parent_id)
+                    if not children:
+                        continue
+                    if (on_delete or rule) == "RESTRICT":
+                        raise HTTPException(
+                            status_code=409,
+                            detail=f"{parent[:-1]} {parent_id} is referenced by {len(children)} {child}"
+                        )
+                    deleted_ids = to_delete.setdefault(child, set())
+                    for ref in children:
+                        child_id = table.value(ref, "id")
+                        if child_id not in deleted_ids:
+                            deleted_ids.add(child_id)
+                            pending.append((child, child_id))
+
+            for name, ids in to_delete.items():
+                data[name] = [item for item in data.get(name, []) if item.get("id") not in ids]
+            self._commit(data, base_stamp, {name: {"deleted": ids} for name, ids in to_delete.items()})
+            return True
     
     # services/database.py (agregar esta función)
 def init_default_admin():
     """Inicializa el usuario admin por defecto si no existe"""
     admin_user = database.get_by_field("users", "email", "admin@coworking.com")
     if not admin_user:
-        from utils.security import get_password_hash
+        from coworking_reservations.utils.hashing import get_password_hash
         admin_data = {
             "nombre": "Administrador",
             "email": "admin@coworking.com",
@@ -0,0 +1,247 @@
+# services/profiling.py
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from time import perf_counter
+from typing import Dict, List, Any, Optional
+
+# Rutas que no cuentan como peticiones perfiladas
+EXCLUDED_PREFIX = "/admin/profiling"
+MAX_RECORDED_REQUESTS = 1000
+MEMORY_TOP_STATS = 25
+
+# Funciones en las que un hilo está esperando (hoja de la pila); esas muestras
+# se cuentan como inactivas y no entran en el flame graph
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Profiler por muestreo que se activa en caliente.
+
+    Mientras está activo, un hilo toma cada ``interval`` segundos la pila de
+    todos los hilos (con ``sys._current_frames``) y acumula las pilas en
+    formato "folded", compatible con flamegraph.pl y speedscope. Los hilos en
+    espera (ver IDLE_FRAMES) solo se cuentan en ``idle_samples``. Si la pila
+    pasa por ProfilingMiddleware, la muestra se atribuye a esa petición. Los
+    endpoints síncronos corren en otro hilo y no se atribuyen. Opcionalmente
+    compara snapshots de tracemalloc al inicio y al final de la sesión.
+    """
+
+    def __init__(self):
+        self.active = False
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._memory_start: Optional[tracemalloc.Snapshot] = None
+        self._remaining_requests: Optional[int] = None
+        self._started_at: Optional[float] = None
+        self._samples: Counter = Counter()
+        self._idle_samples = 0
+        self._request_samples: Counter = Counter()
+        self._requests: List[Dict[str, Any]] = []
+        self._report: Optional[Dict[str, Any]] = None
+
+    def start(
+        self,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+        interval: float = 0.005,
+        memory: bool = False,
+    ):
+        """Inicia una sesión que termina tras ``seconds`` segundos o ``requests`` peticiones."""
+        with self._lock:
+            if self.active or self._stopping:
+                raise RuntimeError("A profiling session is already running")
+            self._samples = Counter()
+            self._idle_samples = 0
+            self._request_samples = Counter()
+            self._requests = []
+            self._report = None
+            self._remaining_requests = requests
+            self._started_at = perf_counter()
+            self._stop_event.clear()
+
+            if memory:
+                tracemalloc.start()
+                self._memory_start = tracemalloc.take_snapshot()
+            else:
+                self._memory_start = None
+
+            self._sampler = threading.Thread(
+                target=self._sample_loop, args=(interval,), name="profiler-sampler", daemon=True
+            )
+            self._sampler.start()
+            if seconds is not None:
+                self._timer = threading.Timer(seconds, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+            self.active = True
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """Detiene la sesión activa y devuelve su reporte; None si no había sesión.
+
+        Bloquea (join del hilo de muestreo y diff de tracemalloc): desde código
+        async debe llamarse en un hilo aparte. Si otra llamada ya está
+        deteniendo la sesión, espera a que el reporte esté listo.
+        """
+        with self._lock:
+            if not self.active:
+                if not self._stopping:
+                    return None
+                self._stopped.wait_for(lambda: not self._stopping)
+                return self._report
+            session = self._begin_stop()
+        return self._finish_stop(*session)
+
+    def _begin_stop(self):
+        """Marca la sesión como "deteniéndose"; se llama con ``_lock`` tomado.
+
+        Hasta que ``_finish_stop`` arma el reporte, ``start()`` se rechaza.
+        """
+        self.active = False
+        self._stopping = True
+        self._stop_event.set()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        sampler, self._sampler = self._sampler, None
+        memory_start, self._memory_start = self._memory_start, None
+        return sampler, self._started_at, memory_start
+
+    def _finish_stop(self, sampler, started_at, memory_start) -> Dict[str, Any]:
+        try:
+            sampler.join()
+            memory = None
+            if memory_start is not None:
+                stats = tracemalloc.take_snapshot().compare_to(memory_start, "lineno")
+                tracemalloc.stop()
+                memory = [
+                    {
+                        "location": str(stat.traceback[0]),
+                        "size_kb": round(stat.size / 1024, 1),
+                        "size_diff_kb": round(stat.size_diff / 1024, 1),
+                        "count": stat.count,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in stats[:MEMORY_TOP_STATS]
+                ]
+
+            with self._lock:
+                self._report = {
+                    "duration_s": round(perf_counter() - started_at, 3),
+                    "samples": sum(self._samples.values()),
+                    "idle_samples": self._idle_samples,
+                    "folded": "\n".join(f"{stack} {count}" for stack, count in self._samples.most_common()),
+                    "memory": memory,
+                    "requests": self._requests,
+                }
+                return self._report
+        finally:
+            with self._lock:
+                self._stopping = False
+                self._stopped.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "stopping": self._stopping,
+                "samples": sum(self._samples.values()),
+                "idle_samples": self._idle_samples,
+                "remaining_requests": self._remaining_requests if self.active else None,
+                "report_available": self._report is not None,
+            }
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        return self._report
+
+    def record_request(self, scope, duration: float):
+        with self._lock:
+            samples = self._request_samples.pop(id(scope), 0)
+            if not self.active:
+                return
+            if len(self._requests) < MAX_RECORDED_REQUESTS:
+                self._requests.append({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "duration_ms": round(duration * 1000, 3),
+                    "samples": samples,
+                })
+            if self._remaining_requests is None:
+                return
+            self._remaining_requests -= 1
+            if self._remaining_requests > 0:
+                return
+            session = self._begin_stop()
+        # Se llama desde el event loop: el cierre bloqueante va en otro hilo
+        threading.Thread(target=self._finish_stop, args=session, name="profiler-stop", daemon=True).start()
+
+    def _sample_loop(self, interval: float):
+        own_id = threading.get_ident()
+        middleware_code = ProfilingMiddleware.__call__.__code__
+        names = {}
+        while not self._stop_event.wait(interval):
+            stacks = []
+            idle = 0
+            request_samples = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    idle += 1
+                    continue
+                stack = []
+                request = None
+                while frame is not None:
+                    if frame.f_code is middleware_code and request is None:
+                        request = frame.f_locals.get("scope")
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if request is not None:
+                    stack.append(f"{request['method']} {request['path']}")
+                    request_samples.append(id(request))
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self._samples.update(stacks)
+                self._idle_samples += idle
+                self._request_samples.update(request_samples)
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que registra cada petición solo mientras hay una sesión activa."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.active or scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIX):
+            return await self.app(scope, receive, send)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.record_request(scope, perf_counter() - start)
+
+
+# Instancia global del profiler
+profiler = Profiler()
@@ -0,0 +1,341 @@
+# services/query.py
+import operator
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterator, Iterable, Sequence, Tuple
+
+# Operadores soportados en los predicados de query()
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+RANGE_OPERATORS = {"<", "<=", ">", ">="}
+
+
+def _bounds(keys, conditions: List[Tuple[str, Any]]) -> Tuple[int, int]:
+    """Posiciones [inicio, fin) de ``keys`` (ordenadas) que cumplen los rangos."""
+    start, end = 0, len(keys)
+    for op, value in conditions:
+        if op == ">":
+            start = max(start, bisect_right(keys, value))
+        elif op == ">=":
+            start = max(start, bisect_left(keys, value))
+        elif op == "<":
+            end = min(end, bisect_left(keys, value))
+        else:
+            end = min(end, bisect_right(keys, value))
+    return start, end
+
+
+class HashIndex:
+    """Índice valor -> refs para valores de cualquier tipo.
+
+    Un valor con un solo registro guarda el ref directamente, así un índice
+    único como ``id`` queda como un dict valor -> ref; con varios registros
+    los refs van ordenados en un ``array('q')``. Las llaves ordenadas para
+    los rangos se calculan al primer rango.
+    """
+
+    def __init__(self):
+        self._refs: Dict[Any, Any] = {}
+        self._keys: Optional[List[Any]] = None
+        self._sortable = True
+
+    def build(self, entries: Iterable[Tuple[Any, int]]):
+        for key, ref in entries:
+            self.add(key, ref)
+
+    def get(self, key: Any) -> Sequence[int]:
+        refs = self._refs.get(key)
+        if refs is None:
+            return ()
+        return (refs,) if type(refs) is int else refs
+
+    def add(self, key: Any, ref: int):
+        refs = self._refs.get(key)
+        if refs is None:
+            self._refs[key] = ref
+            if self._keys is not None and key is not None:
+                try:
+                    insort(self._keys, key)
+                except TypeError:
+                    self._keys = None
+                    self._sortable = False
+        elif type(refs) is int:
+            self._refs[key] = array("q", (refs, ref) if refs < ref else (ref, refs))
+        elif refs[-1] < ref:
+            refs.append(ref)
+        else:
+            refs.insert(bisect_left(refs, ref), ref)
+
+    def remove(self, key: Any, ref: int):
+        refs = self._refs[key]
+        if type(refs) is int:
+            del self._refs[key]
+            if self._keys is not None and key is not None:
+                del self._keys[bisect_left(self._keys, key)]
+            return
+        del refs[bisect_left(refs, ref)]
+        if len(refs) == 1:
+            self._refs[key] = refs[0]
+
+    def range(self, conditions: List[Tuple[str, Any]]) -> Optional[List[int]]:
+        """Refs ordenados de los valores dentro del rango; None si no se puede resolver."""
+        if self._keys is None and self._sortable:
+            try:
+                self._keys = sorted(key for key in self._refs if key is not None)
+            except TypeError:
+                # Tipos mezclados en el campo: el rango se evalúa sin índice
+                self._sortable = False
+        if self._keys is None:
+            return None
+        try:
+            start, end = _bounds(self._keys, conditions)
+        except TypeError:
+            return None
+        refs: List[int] = []
+        for key in self._keys[start:end]:
+            bucket = self._refs[key]
+            if type(bucket) is int:
+                refs.append(bucket)
+            else:
+                refs.extend(bucket)
+        refs.sort()
+        return refs
+
+
+class SortedIndex:
+    """Índice de un campo entero como dos ``array('q')`` paralelos ordenados por (valor, ref).
+
+    Ocupa 16 bytes por registro y ningún objeto por valor; igualdades y
+    rangos se resuelven con búsqueda binaria.
+    """
+
+    def __init__(self):
+        self._keys = array("q")
+        self._refs = array("q")
+
+    def build(self, entries: Iterable[Tuple[int, int]]):
+        pairs = sorted(entries)
+        self._keys = array("q", [key for key, _ in pairs])
+        self._refs = array("q", [ref for _, ref in pairs])
+
+    def _position(self, key: int, ref: int) -> int:
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        return bisect_left(self._refs, ref, lo, hi)
+
+    def get(self, key: Any) -> Sequence[int]:
+        if not isinstance(key, (int, float)):
+            return ()
+        lo = bisect_left(self._keys, key)
+        return self._refs[lo:bisect_right(self._keys, key, lo)]
+
+    def add(self, key: int, ref: int):
+        position = self._position(key, ref)
+        self._keys.insert(position, key)
+        self._refs.insert(position, ref)
+
+    def remove(self, key: int, ref: int):
+        position = self._position(key, ref)
+        del self._keys[position]
+        del self._refs[position]
+
+    def range(self, conditions: List[Tuple[str, Any]]) -> Optional[List[int]]:
+        try:
+            start, end = _bounds(self._keys, conditions)
+        except TypeError:
+            return None
+        return sorted(self._refs[start:end])
+
+
+class Table:
+    """Colección en memoria con índices por campo y un planificador de consultas.
+
+    Cada registro se identifica con una referencia entera estable (``ref``).
+    Las subclases definen cómo leer un campo, cómo codificar un valor de
+    consulta al formato guardado y cómo materializar un registro como dict.
+    Los índices se construyen al primer uso y se mantienen en cada cambio.
+    """
+
+    def __init__(self, indexed_fields: List[str]):
+        # Campos indexables, en orden de preferencia (los más selectivos primero)
+        self.indexed_fields = indexed_fields
+        self._indexes: Dict[str, Any] = {}
+
+    def refs(self) -> List[int]:
+        raise NotImplementedError
+
+    def value(self, ref: int, field: str) -> Any:
+        raise NotImplementedError
+
+    def materialize(self, ref: int) -> Optional[Dict[str, Any]]:
+        """Registro como dict, o None si el ref se eliminó."""
+        raise NotImplementedError
+
+    def encode(self, field: str, value: Any) -> Any:
+        return value
+
+    def _new_index(self, field: str):
+        return HashIndex()
+
+    def _index_key(self, ref: int, field: str) -> Any:
+        """Llave del registro en el índice del campo (el valor codificado)."""
+        return self.value(ref, field)
+
+    def index(self, field: str):
+        """Índice del campo (HashIndex o SortedIndex), construido al primer uso."""
+        if field not in self._indexes:
+            index = self._new_index(field)
+            index.build((self._index_key(ref, field), ref) for ref in self.refs())
+            self._indexes[field] = index
+        return self._indexes[field]
+
+    def lookup(self, field: str, value: Any) -> Sequence[int]:
+        return self.index(field).get(self.encode(field, value))
+
+    # Mantenimiento de índices: las subclases los llaman al insertar, modificar y eliminar
+
+    def _indexed_values(self, ref: int) -> Dict[str, Any]:
+        return {field: self._index_key(ref, field) for field in self._indexes}
+
+    def _add_to_indexes(self, ref: int):
+        for field, index in self._indexes.items():
+            index.add(self._index_key(ref, field), ref)
+
+    def _remove_from_indexes(self, ref: int):
+        for field, index in self._indexes.items():
+            index.remove(self._index_key(ref, field), ref)
+
+    def _reindex(self, ref: int, old_values: Dict[str, Any]):
+        for field, old in old_values.items():
+            new = self._index_key(ref, field)
+            if new != old:
+                index = self._indexes[field]
+                index.remove(old, ref)
+                index.add(new, ref)
+
+    def _plan(self, where: List[Tuple[str, str, Any]]) -> Tuple[Iterable[int], List[Tuple[str, str, Any]]]:
+        """Elige el índice más selectivo; devuelve los candidatos y los predicados restantes.
+
+        Solo se comparan índices ya construidos más el campo preferido según
+        ``indexed_fields``, así una consulta no construye índices que no usa.
+        """
+        priority = {field: i for i, field in enumerate(self.indexed_fields)}
+        eq_fields = [field for field, op, _ in where if op == "==" and field in priority]
+        range_fields = [field for field, op, _ in where if op in RANGE_OPERATORS and field in priority]
+        preferred = min(eq_fields or range_fields, key=priority.get, default=None)
+
+        best = None
+        for position, (field, op, value) in enumerate(where):
+            if field in eq_fields and op == "==" and (field == preferred or field in self._indexes):
+                candidates = self.index(field).get(value)
+                if best is None or len(candidates) < best[0]:
+                    best = (len(candidates), candidates, {position})
+
+        for field in set(range_fields):
+            if field != preferred and field not in self._indexes:
+                continue
+            used = {i for i, (f, op, _) in enumerate(where) if f == field and op in RANGE_OPERATORS}
+            candidates = self.index(field).range([where[i][1:] for i in sorted(used)])
+            if candidates is None:
+                continue
+            if best is None or len(candidates) < best[0]:
+                best = (len(candidates), candidates, used)
+
+        if best is None:
+            return self.refs(), where
+        _, candidates, used = best
+        return candidates, [predicate for i, predicate in enumerate(where) if i not in used]
+
+    def query(
+        self,
+        where: Optional[List[Tuple[str, str, Any]]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Consulta con predicados (campo, operador, valor) combinados con AND.
+
+        El resto de predicados se evalúa de forma perezosa sobre los
+        candidatos del índice elegido; los dicts se materializan al final.
+        Los candidatos se fijan al llamar: si otra escritura elimina un
+        registro mientras se recorre el resultado, ese registro se omite, y
+        uno modificado se devuelve con sus valores actuales.
+        """
+        encoded = []
+        for field, op, value in where or []:
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {op}")
+            encoded.append((field, op, self.encode(field, value)))
+
+        candidates, remaining = self._plan(encoded)
+        checks = [(field, OPERATORS[op], value) for field, op, value in remaining]
+        read = self.value
+
+        def matches(ref):
+            for field, compare, value in checks:
+                try:
+                    if not compare(read(ref, field), value):
+                        return False
+                except TypeError:
+                    # Valores no comparables (p. ej. campo ausente en un rango)
+                    return False
+            return True
+
+        refs = (ref for ref in list(candidates) if matches(ref))
+        if order_by is not None:
+            refs = iter(sorted(
+                refs,
+                key=lambda ref: (read(ref, order_by) is None, read(ref, order_by)),
+                reverse=descending,
+            ))
+        if limit is not None:
+            refs = islice(refs, limit)
+        records = (self.materialize(ref) for ref in refs)
+        return (record for record in records if record is not None)
+
+
+class DictTable(Table):
+    """Colección guardada como dicts."""
+
+    def __init__(self, items: Iterable[Dict[str, Any]], indexed_fields: List[str]):
+        super().__init__(indexed_fields)
+        self._rows: Dict[int, Dict[str, Any]] = dict(enumerate(items))
+        self._next_ref = len(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def refs(self) -> List[int]:
+        return list(self._rows)
+
+    def value(self, ref: int, field: str) -> Any:
+        row = self._rows.get(ref)
+        return None if row is None else row.get(field)
+
+    def materialize(self, ref: int) -> Optional[Dict[str, Any]]:
+        # Copia: quien llama puede modificar el resultado sin alterar la caché
+        row = self._rows.get(ref)
+        return None if row is None else dict(row)
+
+    def insert(self, item: Dict[str, Any]) -> int:
+        ref = self._next_ref
+        self._next_ref += 1
+        self._rows[ref] = dict(item)
+        self._add_to_indexes(ref)
+        return ref
+
+    def replace(self, ref: int, item: Dict[str, Any]):
+        old_values = self._indexed_values(ref)
+        self._rows[ref] = dict(item)
+        self._reindex(ref, old_values)
+
+    def remove(self, ref: int):
+        self._remove_from_indexes(ref)
+        del self._rows[ref]
@@ -0,0 +1,87 @@
+# services/snapshot.py
+import marshal
+import mmap
+import os
+import struct
+from typing import Dict, List, Any, Optional, Tuple
+
+# Formato del snapshot binario:
+#   cabecera  -> MAGIC, versión de marshal, stamp del JSON (inodo, mtime_ns, tamaño), nº de colecciones
+#   tabla     -> por colección: nombre, offset y longitud de su bloque
+#   datos     -> un bloque marshal por colección, decodificado solo cuando se usa
+MAGIC = b"CWSNAP02"
+_HEADER = struct.Struct("<8sIqqqI")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<QQ")
+
+
+def write_snapshot(path: str, data: Dict[str, Any], stamp: Tuple[int, int, int]):
+    """Escribe el snapshot de forma atómica (archivo temporal + replace)."""
+    blocks = [(name.encode("utf-8"), marshal.dumps(items)) for name, items in data.items()]
+
+    table_size = sum(_NAME_LEN.size + len(name) + _ENTRY.size for name, _ in blocks)
+    offset = _HEADER.size + table_size
+
+    table = bytearray()
+    for name, block in blocks:
+        table += _NAME_LEN.pack(len(name)) + name + _ENTRY.pack(offset, len(block))
+        offset += len(block)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, marshal.version, *stamp, len(blocks)))
+        f.write(table)
+        for _, block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Snapshot mapeado en memoria; cada colección se decodifica bajo demanda."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, inode, mtime_ns, size, count = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != marshal.version:
+                raise ValueError("Unsupported snapshot format")
+            self.stamp = (inode, mtime_ns, size)
+
+            self._entries: Dict[str, Tuple[int, int]] = {}
+            position = _HEADER.size
+            for _ in range(count):
+                (name_len,) = _NAME_LEN.unpack_from(self._mm, position)
+                position += _NAME_LEN.size
+                name = self._mm[position:position + name_len].decode("utf-8")
+                position += name_len
+                self._entries[name] = _ENTRY.unpack_from(self._mm, position)
+                position += _ENTRY.size
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, path: str, stamp: Tuple[int, int, int]) -> Optional["Snapshot"]:
+        """Abre el snapshot solo si corresponde a la versión actual del JSON."""
+        try:
+            snapshot = cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if snapshot.stamp != stamp:
+            snapshot.close()
+            return None
+        return snapshot
+
+    def __contains__(self, collection: str) -> bool:
+        return collection in self._entries
+
+    def collections(self) -> List[str]:
+        return list(self._entries)
+
+    def load(self, collection: str) -> Any:
+        offset, length = self._entries[collection]
+        return marshal.loads(self._mm[offset:offset + length])
+
+    def close(self):
+        self._mm.close()
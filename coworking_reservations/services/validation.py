@@ -1,5 +1,5 @@
 # services/validation.py
-from datetime import datetime, time, date
+from datetime import date
 from coworking_reservations.services.database import database
 
 def validate_reservation(reservation, user_id):
@@ -25,14 +25,14 @@ def validate_reservation(reservation, user_id):
         return {"valid": False, "message": "Reservations must be exactly 1 hour long"}
     
     # Verificar que no hay cruce de horarios
-    existing_reservations = database.get_all_by_field("reservations", "room_id", reservation.room_id)
-    existing_reservations = [r for r in existing_reservations if r["fecha"] == reservation.fecha.isoformat() and r["estado"] != "cancelada"]
-    
-    for existing in existing_reservations:
-        existing_start = time.fromisoformat(existing["hora_inicio"])
-        existing_end = time.fromisoformat(existing["hora_fin"])
-        
-        if (reservation.hora_inicio < existing_end and reservation.hora_fin > existing_start):
-            return {"valid": False, "message": "Time slot already booked"}
+    overlapping = database.query("reservations", [
+        ("room_id", "==", reservation.room_id),
+        ("fecha", "==", reservation.fecha),
+        ("estado", "!=", "cancelada"),
+        ("hora_inicio", "<", reservation.hora_fin),
+        ("hora_fin", ">", reservation.hora_inicio),
+    ], limit=1)
+    if next(overlapping, None) is not None:
+        return {"valid": False, "message": "Time slot already booked"}
     
     return {"valid": True, "message": "Reservation is valid"}
\ No newline at end of file
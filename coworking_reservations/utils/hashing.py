@@ -0,0 +1,95 @@
+# utils/hashing.py
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from time import monotonic
+from passlib.context import CryptContext
+
+# Parámetros de hashing por despliegue
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+VERIFY_CACHE_TTL_SECONDS = float(os.getenv("PASSWORD_VERIFY_CACHE_TTL", "300"))
+VERIFY_CACHE_SIZE = int(os.getenv("PASSWORD_VERIFY_CACHE_SIZE", "1024"))
+
+
+class PasswordHasher:
+    """Servicio único de hashing de contraseñas.
+
+    Todos los hashes nuevos usan ``rounds``; los hashes con otro costo se
+    marcan para regenerarse (``needs_rehash``). Las verificaciones exitosas
+    se recuerdan ``cache_ttl`` segundos bajo un HMAC con clave aleatoria del
+    proceso, de modo que repetir el login no paga otra ronda de bcrypt. La
+    caché nunca guarda la contraseña y se invalida sola si cambia el hash.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, cache_ttl: float = VERIFY_CACHE_TTL_SECONDS, cache_size: int = VERIFY_CACHE_SIZE):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache_key = secrets.token_bytes(32)
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hash(self, password: str) -> str:
+        return self.context.hash(password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        try:
+            return self.context.needs_update(hashed_password)
+        except (ValueError, TypeError):
+            # Hash mal formado: no se puede regenerar sin una verificación válida
+            return False
+
+    def _cache_digest(self, password: str, hashed_password: str, scope: str) -> bytes:
+        message = "\0".join([scope, hashed_password, password]).encode("utf-8")
+        return hmac.new(self._cache_key, message, hashlib.sha256).digest()
+
+    def verify(self, password: str, hashed_password: str, scope: str = "") -> bool:
+        """Verifica la contraseña; ``scope`` (p. ej. cliente + email) delimita la caché."""
+        if not hashed_password:
+            return False
+
+        digest = self._cache_digest(password, hashed_password, scope) if self.cache_ttl > 0 else None
+        if digest is not None:
+            now = monotonic()
+            with self._lock:
+                expires_at = self._cache.get(digest)
+                if expires_at is not None:
+                    if expires_at > now:
+                        return True
+                    del self._cache[digest]
+
+        try:
+            if not self.context.verify(password, hashed_password):
+                return False
+        except (ValueError, TypeError):
+            # Hash mal formado o no reconocido: se trata como contraseña incorrecta
+            return False
+
+        if digest is not None:
+            with self._lock:
+                self._cache[digest] = monotonic() + self.cache_ttl
+                self._cache.move_to_end(digest)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return True
+
+
+# Instancia global del servicio de hashing
+password_hasher = PasswordHasher()
+
+
+def verify_password(plain_password: str, hashed_password: str, scope: str = "") -> bool:
+    return password_hasher.verify(plain_password, hashed_password, scope)
+
+
+def get_password_hash(password: str) -> str:
+    return password_hasher.hash(password)
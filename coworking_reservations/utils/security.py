@@ -1,37 +1,76 @@
 # utils/security.py
-from passlib.context import CryptContext
+import threading
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
 from coworking_reservations.services.database import database
+from coworking_reservations.utils.hashing import password_hasher
 
 # Configuración de seguridad
 SECRET_KEY = "tu_clave_secreta_super_segura_aqui_cambiar_en_produccion"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Contexto para hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Contexto para hashing de contraseñas (configurado en utils/hashing.py)
+pwd_context = password_hasher.context
 
 # Esquema OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def verify_password(plain_password, hashed_password, scope: str = ""):
+    return password_hasher.verify(plain_password, hashed_password, scope)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+def needs_password_rehash(hashed_password) -> bool:
+    return password_hasher.needs_rehash(hashed_password)
+
+# Usuarios con un rehash pendiente: varios logins seguidos encolan uno solo
+_pending_rehash = set()
+_pending_rehash_lock = threading.Lock()
+
+def schedule_rehash(user_id: int) -> bool:
+    """Reserva el rehash de un usuario; False si ya hay uno pendiente"""
+    with _pending_rehash_lock:
+        if user_id in _pending_rehash:
+            return False
+        _pending_rehash.add(user_id)
+        return True
+
+def rehash_password(user_id: int, password: str, old_hash: str):
+    """Regenera el hash con los parámetros actuales (se ejecuta después de responder).
+
+    Solo se guarda si el hash almacenado sigue siendo ``old_hash``; si la
+    contraseña cambió o el usuario se eliminó mientras tanto, no se hace nada.
+    """
+    try:
+        user = database.get_by_id("users", user_id)
+        if not user or user.get("contraseña_hash") != old_hash:
+            return
+        database.update(
+            "users",
+            user_id,
+            {"contraseña_hash": get_password_hash(password)},
+            expected={"contraseña_hash": old_hash},
+        )
+    except HTTPException:
+        # El usuario fue eliminado mientras tanto
+        pass
+    finally:
+        with _pending_rehash_lock:
+            _pending_rehash.discard(user_id)
 
 def get_user_by_email(email: str):
     return database.get_by_field("users", "email", email)
 
-def authenticate_user(email: str, password: str):
+def authenticate_user(email: str, password: str, client: str = ""):
     user = get_user_by_email(email)
     if not user:
         return False
-    if not verify_password(password, user["contraseña_hash"]):
+    if not verify_password(password, user["contraseña_hash"], scope=f"{client}:{email}"):
         return False
     return user
 
@@ -0,0 +1,47 @@
+import asyncio
+
+from coworking_reservations.services.bulk import _iter_csv_rows, _iter_jsonl_rows, export_rows
+
+
+async def _lines(text):
+    for line in text.split("\n"):
+        yield line
+
+
+def parse(parser, text):
+    async def collect():
+        return [row async for row in parser(_lines(text))]
+    return asyncio.run(collect())
+
+
+def test_csv_quoted_fields_can_span_lines():
+    text = 'nombre,descripcion\nSala A,"Primera línea\nsegunda, con coma"\n\nSala B,"Con ""comillas"""\n'
+    assert parse(_iter_csv_rows, text) == [
+        (2, {"nombre": "Sala A", "descripcion": "Primera línea\nsegunda, con coma"}, None),
+        (5, {"nombre": "Sala B", "descripcion": 'Con "comillas"'}, None),
+    ]
+
+
+def test_csv_reports_bad_rows_by_line():
+    text = 'nombre,capacidad\nSala A,4,extra\nSala B,\n"Sala C,3\n'
+    assert parse(_iter_csv_rows, text) == [
+        (2, None, "Expected 2 columns, got 3"),
+        (3, {"nombre": "Sala B"}, None),
+        (4, None, "Unterminated quoted field"),
+    ]
+
+
+def test_jsonl_rows():
+    rows = parse(_iter_jsonl_rows, '{"nombre": "Sala A"}\n[1]\nnot json\n')
+    assert rows[0] == (1, {"nombre": "Sala A"}, None)
+    assert rows[1] == (2, None, "Each line must be a JSON object")
+    assert rows[2][0] == 3 and rows[2][2].startswith("Invalid JSON")
+
+
+def test_export_csv_round_trips_multiline_fields():
+    items = [{"nombre": "Sala A", "descripcion": "dos\nlíneas"}, {"nombre": "Sala B", "descripcion": ""}]
+    text = "".join(export_rows(iter(items), "csv", ["nombre", "descripcion"]))
+    assert parse(_iter_csv_rows, text) == [
+        (2, items[0], None),
+        (4, {"nombre": "Sala B"}, None),
+    ]
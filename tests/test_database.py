@@ -0,0 +1,87 @@
+import json
+from datetime import date, time
+
+import pytest
+from fastapi import HTTPException
+
+from coworking_reservations.services.database import JSONDatabase
+
+
+@pytest.fixture(params=[True, False], ids=["columnar", "dict"])
+def db(request, tmp_path):
+    return JSONDatabase(str(tmp_path / "database.json"), columnar_reservations=request.param)
+
+
+def reservation(room_id, usuario_id=2, hour=9):
+    return {
+        "room_id": room_id,
+        "usuario_id": usuario_id,
+        "fecha": date(2030, 1, 1),
+        "hora_inicio": time(hour),
+        "hora_fin": time(hour + 1),
+        "estado": "pendiente",
+    }
+
+
+def test_writes_are_visible_to_other_instances(db):
+    other = JSONDatabase(db.file_path, columnar_reservations=db.columnar_reservations)
+    assert other.get_by_id("users", 1)["nombre"] == "Administrador"
+
+    # Mismo tamaño de archivo: el stamp cambia igual porque cada escritura crea un archivo nuevo
+    db.update("users", 1, {"nombre": "Administradoa"})
+    assert other.get_by_id("users", 1)["nombre"] == "Administradoa"
+
+    created = db.create("reservations", reservation(room_id=1))
+    assert other.get_by_id("reservations", created["id"])["fecha"] == "2030-01-01"
+
+
+def test_get_by_id_matches_ids_stored_as_text(db):
+    with open(db.file_path) as f:
+        data = json.load(f)
+    data["sedes"].append({"id": "9", "nombre": "Sede antigua", "ciudad": "Cali"})
+    with open(db.file_path, "w") as f:
+        json.dump(data, f)
+
+    assert db.get_by_id("sedes", 9)["nombre"] == "Sede antigua"
+    assert db.get_by_id("sedes", 99) is None
+    assert db.delete("sedes", 9)
+    assert db.get_by_id("sedes", 9) is None
+
+
+def test_delete_cascades_through_foreign_keys(db):
+    kept = db.create("reservations", reservation(room_id=2))
+    removed = db.create("reservations", reservation(room_id=1))
+
+    assert db.delete("sedes", 1)
+
+    assert db.get_by_id("rooms", 1) is None and db.get_by_id("rooms", 2) is None
+    assert db.get_all_by_field("room_recursos", "room_id", 1) == []
+    assert db.get_by_id("reservations", removed["id"]) is None
+    assert db.get_by_id("reservations", kept["id"]) is None
+    assert db.get_by_id("rooms", 3) is not None
+
+
+def test_delete_restrict_keeps_the_row(db):
+    db.create("reservations", reservation(room_id=3))
+    with pytest.raises(HTTPException) as exc:
+        db.delete("rooms", 3, on_delete="RESTRICT")
+    assert exc.value.status_code == 409
+    assert db.get_by_id("rooms", 3) is not None
+
+
+def test_update_with_expected_skips_changed_rows(db):
+    assert db.update("users", 2, {"rol": "admin"}, expected={"rol": "guest"}) is None
+    assert db.get_by_id("users", 2)["rol"] == "user"
+    assert db.update("users", 2, {"rol": "admin"}, expected={"rol": "user"})["rol"] == "admin"
+
+
+def test_invalid_reservation_falls_back_to_dicts(tmp_path):
+    db = JSONDatabase(str(tmp_path / "database.json"))
+    with open(db.file_path) as f:
+        data = json.load(f)
+    data["reservations"].append({"id": 1, "room_id": 1, "usuario_id": 2, "fecha": None, "estado": "pendiente"})
+    with open(db.file_path, "w") as f:
+        json.dump(data, f)
+
+    assert db.get_by_id("reservations", 1)["fecha"] is None
+    assert db.delete("users", 2)
@@ -0,0 +1,146 @@
+import operator
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from coworking_reservations.services.columnar import ReservationColumns
+from coworking_reservations.services.query import DictTable
+
+INDEXED_FIELDS = ["id", "room_id", "usuario_id", "fecha", "estado"]
+ESTADOS = ["pendiente", "confirmada", "cancelada"]
+# Valores que nunca aparecen en los datos generados
+ABSENT = {"id": -1, "room_id": -1, "usuario_id": -1, "fecha": "2024-01-01", "estado": "archivada"}
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def make_reservation(rng, reservation_id):
+    hour = rng.randint(6, 20)
+    return {
+        "room_id": rng.randint(1, 5),
+        "fecha": (date(2025, 1, 1) + timedelta(days=rng.randint(0, 9))).isoformat(),
+        "hora_inicio": time(hour).isoformat(),
+        "hora_fin": time(hour + 1).isoformat(),
+        "usuario_id": rng.randint(1, 4),
+        "estado": rng.choice(ESTADOS),
+        "id": reservation_id,
+        "created_at": datetime(2025, 1, 1, 8, 0, reservation_id % 60).isoformat(),
+    }
+
+
+def random_where(rng):
+    values = {
+        "id": lambda: rng.randint(0, 80),
+        "room_id": lambda: rng.randint(0, 6),
+        "usuario_id": lambda: rng.randint(1, 4),
+        "fecha": lambda: (date(2025, 1, 1) + timedelta(days=rng.randint(-1, 10))).isoformat(),
+        "estado": lambda: rng.choice(ESTADOS),
+        "hora_inicio": lambda: time(rng.randint(5, 21)).isoformat(),
+    }
+    fields = rng.sample(sorted(values), rng.randint(1, 3))
+    return [(field, rng.choice(sorted(OPERATORS)), values[field]()) for field in fields]
+
+
+def brute_force(records, where):
+    return [
+        record for record in records
+        if all(OPERATORS[op](record.get(field), value) for field, op, value in where)
+    ]
+
+
+def build(kind, records):
+    if kind == "columnar":
+        return ReservationColumns.from_records(records, INDEXED_FIELDS)
+    return DictTable(records, INDEXED_FIELDS)
+
+
+@pytest.fixture(params=["dict", "columnar"])
+def kind(request):
+    return request.param
+
+
+def test_indexes_follow_inserts_replaces_and_removes(kind):
+    rng = random.Random(7)
+    records = {i: make_reservation(rng, i) for i in range(1, 41)}
+    table = build(kind, list(records.values()))
+    refs = {table.value(ref, "id"): ref for ref in table.refs()}
+    # Construir todos los índices (y las llaves ordenadas de los rangos) antes de escribir
+    for field in INDEXED_FIELDS:
+        list(table.query([(field, ">=", records[1][field])]))
+
+    next_id = 41
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.4 or not records:
+            record = make_reservation(rng, next_id)
+            refs[next_id] = table.insert(record)
+            records[next_id] = record
+            next_id += 1
+        elif action < 0.7:
+            reservation_id = rng.choice(sorted(records))
+            record = dict(make_reservation(rng, reservation_id), created_at=records[reservation_id]["created_at"])
+            table.replace(refs[reservation_id], record)
+            records[reservation_id] = record
+        else:
+            reservation_id = rng.choice(sorted(records))
+            table.remove(refs.pop(reservation_id))
+            del records[reservation_id]
+
+        for field in INDEXED_FIELDS:
+            expected = {}
+            for record in records.values():
+                expected.setdefault(record[field], []).append(record["id"])
+            for value, ids in expected.items():
+                assert sorted(table.value(ref, "id") for ref in table.lookup(field, value)) == sorted(ids)
+            assert not table.lookup(field, ABSENT[field])
+
+        where = random_where(rng)
+        assert list(table.query(where)) == brute_force(sorted(records.values(), key=lambda r: refs[r["id"]]), where)
+
+
+def test_dict_and_columnar_tables_return_the_same_rows():
+    rng = random.Random(3)
+    records = [make_reservation(rng, i) for i in range(1, 201)]
+    dict_table = build("dict", records)
+    columnar_table = build("columnar", records)
+
+    for _ in range(300):
+        where = random_where(rng)
+        order_by = rng.choice([None, "fecha", "hora_inicio", "estado", "id"])
+        descending = rng.random() < 0.5
+        limit = rng.choice([None, 1, 10])
+        expected = brute_force(records, where)
+        if order_by is not None:
+            expected = sorted(expected, key=lambda r: r[order_by], reverse=descending)
+        expected = expected[:limit]
+
+        from_dicts = list(dict_table.query(where, order_by, descending, limit))
+        from_columns = list(columnar_table.query(where, order_by, descending, limit))
+        assert from_dicts == from_columns
+        if order_by is None:
+            assert from_dicts == expected
+        else:
+            assert [r[order_by] for r in from_dicts] == [r[order_by] for r in expected]
+
+
+def test_removed_rows_are_skipped_while_iterating(kind):
+    rng = random.Random(5)
+    table = build(kind, [make_reservation(rng, i) for i in range(1, 11)])
+    rows = table.query()
+    assert next(rows)["id"] == 1
+    table.remove(table.lookup("id", 2)[0])
+    assert [row["id"] for row in rows] == list(range(3, 11))
+
+
+def test_columnar_rejects_rows_it_cannot_encode():
+    record = make_reservation(random.Random(1), 1)
+    record["fecha"] = None
+    with pytest.raises(ValueError):
+        ReservationColumns.from_records([record], INDEXED_FIELDS)
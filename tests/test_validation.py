@@ -0,0 +1,56 @@
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from coworking_reservations.services import validation
+from coworking_reservations.services.database import JSONDatabase
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+@pytest.fixture(params=[True, False], ids=["columnar", "dict"])
+def db(request, tmp_path, monkeypatch):
+    database = JSONDatabase(str(tmp_path / "database.json"), columnar_reservations=request.param)
+    monkeypatch.setattr(validation, "database", database)
+    database.create("reservations", {
+        "room_id": 1,
+        "usuario_id": 2,
+        "fecha": TOMORROW,
+        "hora_inicio": time(10),
+        "hora_fin": time(11),
+        "estado": "confirmada",
+    })
+    return database
+
+
+def booking(hour, minute=0, room_id=1, fecha=TOMORROW):
+    start = time(hour, minute)
+    end = time(hour + 1, minute)
+    return SimpleNamespace(room_id=room_id, fecha=fecha, hora_inicio=start, hora_fin=end)
+
+
+@pytest.mark.parametrize("hour, minute", [(10, 0), (9, 30), (10, 30)])
+def test_overlapping_booking_is_rejected(db, hour, minute):
+    result = validation.validate_reservation(booking(hour, minute), user_id=3)
+    assert result == {"valid": False, "message": "Time slot already booked"}
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"hour": 9},
+    {"hour": 11},
+    {"hour": 10, "room_id": 2},
+    {"hour": 10, "fecha": TOMORROW + timedelta(days=1)},
+])
+def test_adjacent_or_other_slots_are_valid(db, kwargs):
+    assert validation.validate_reservation(booking(**kwargs), user_id=3)["valid"]
+
+
+def test_cancelled_reservations_free_the_slot(db):
+    db.update("reservations", 1, {"estado": "cancelada"})
+    assert validation.validate_reservation(booking(10), user_id=3)["valid"]
+
+
+def test_unknown_room_is_rejected(db):
+    result = validation.validate_reservation(booking(10, room_id=99), user_id=3)
+    assert result == {"valid": False, "message": "Room not found"}